@@ -7,18 +7,121 @@ Performance máxima com RPC nativo, batching inteligente e retry logic
 
 import os
 import re
+import gzip
 import json
 import time
+import atexit
+import asyncio
+import logging
 import requests
-from typing import Dict, List, Any, Optional
+from dataclasses import dataclass, asdict, is_dataclass
+from typing import Dict, List, Any, ClassVar, Optional, Tuple
 from datetime import datetime, timedelta
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import httpx
+    # http2=True exige o extra h2 (pip install httpx[http2]) e levanta
+    # ImportError no construtor do Client se ele faltar; sem h2 o httpx
+    # ainda vale pelo keep-alive, só sem multiplexação
+    try:
+        import h2  # noqa: F401
+        _HTTPX_HTTP2 = True
+    except ImportError:
+        _HTTPX_HTTP2 = False
+except ImportError:
+    httpx = None
+    _HTTPX_HTTP2 = False
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# Abaixo disso o overhead de montar as colunas Arrow não compensa
+_ARROW_MIN_BATCH = 500
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Batches concorrentes no upload assíncrono
+RPC_BATCH_SIZE = 500
+MAX_CONCURRENT_UPLOADS = 8
+
+# Corpos menores que isso não compensam o CPU da compressão
+GZIP_MIN_BYTES = 16_384
+
+# Alvo de ~1 MB por requisição: itens com description/metadata grandes não
+# estouram o timeout do PostgREST, itens pequenos não desperdiçam round trips
+TARGET_BATCH_BYTES = 1_048_576
+
+# Disponibilidade da função RPC por URL (compartilhado entre instâncias,
+# resolvido pelo primeiro batch real em vez de uma sonda extra no __init__)
+_RPC_STATUS_CACHE: Dict[str, bool] = {}
+
+# logger.info/debug com args %s só formata se o nível estiver habilitado,
+# ao contrário do print que sempre paga formatação + write() no stdout
+logger = logging.getLogger(__name__)
+
+
+def _json_default(obj: Any) -> Any:
+    if is_dataclass(obj):
+        return asdict(obj)
+    return str(obj)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serializa o payload uma única vez (orjson é 3-10x mais rápido que o stdlib)"""
+    if orjson is not None:
+        # orjson serializa dataclasses nativamente
+        return orjson.dumps(obj, default=_json_default)
+    return json.dumps(obj, default=_json_default).encode('utf-8')
+
+
+def _pack_by_size(items: List[Any], target_bytes: int = TARGET_BATCH_BYTES) -> List[Tuple[List[Any], bytes]]:
+    """Agrupa itens por bytes serializados (~target_bytes por batch) em vez
+    de contagem fixa de linhas, gerando unidades de trabalho uniformes.
+
+    Cada item é serializado UMA vez: os fragmentos são reaproveitados para
+    montar o corpo {"items": [...]} do batch, então devolvemos pares
+    (itens, corpo_pronto) e quem envia não serializa de novo"""
+    batches = []
+    batch = []
+    parts = []
+    size = 0
+    for item in items:
+        part = _json_dumps(item)
+        if batch and size + len(part) + 1 > target_bytes:
+            batches.append((batch, b'{"items":[' + b','.join(parts) + b']}'))
+            batch = []
+            parts = []
+            size = 0
+        batch.append(item)
+        parts.append(part)
+        size += len(part) + 1
+    if batch:
+        batches.append((batch, b'{"items":[' + b','.join(parts) + b']}'))
+    return batches
+
 
 class SupabaseClient:
     """Cliente otimizado para Supabase com connection pooling e retry logic"""
-    
+
+    # Clientes HTTP compartilhados por URL: amortiza handshake TLS/TCP e
+    # reaproveita keep-alive entre instâncias no mesmo processo
+    _sessions: ClassVar[Dict[str, Any]] = {}
+
     def __init__(self):
         self.url = os.getenv('SUPABASE_URL')
         self.key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
@@ -26,22 +129,35 @@ class SupabaseClient:
         if not self.url or not self.key:
             raise ValueError("Configure SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY")
         
+        # return=minimal: PostgREST não serializa nem devolve as linhas
+        # inseridas (centenas de KB por batch que seriam baixados e jogados fora)
         self.headers = {
             'apikey': self.key,
             'Authorization': f'Bearer {self.key}',
             'Content-Type': 'application/json',
             'Prefer': 'return=minimal'
         }
-        
-        # Session com connection pooling e retry
-        self.session = self._create_session()
-        
-        # Cache de disponibilidade da função RPC
-        self._rpc_available = None
-        self._check_rpc_availability()
+
+        # Variante para o upsert REST (computada uma vez; _upsert_fallback
+        # não precisa copiar/mutar headers por batch)
+        self._upsert_headers = {**self.headers,
+                                'Prefer': 'resolution=merge-duplicates,return=minimal'}
+
+        # Session com connection pooling e retry (compartilhada por URL)
+        if self.url not in SupabaseClient._sessions:
+            SupabaseClient._sessions[self.url] = self._create_session()
+        self.session = SupabaseClient._sessions[self.url]
     
-    def _create_session(self) -> requests.Session:
-        """Cria session com connection pooling e retry automático"""
+    def _create_session(self):
+        """Cria o cliente HTTP: httpx com HTTP/2 quando disponível, senão requests"""
+        if httpx is not None:
+            # HTTP/2 multiplexa os batches em 1-2 conexões TCP (menos handshakes)
+            return httpx.Client(
+                http2=_HTTPX_HTTP2,
+                timeout=httpx.Timeout(120.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=20)
+            )
+
         session = requests.Session()
         
         retry_strategy = Retry(
@@ -59,43 +175,55 @@ class SupabaseClient:
         
         session.mount("https://", adapter)
         session.mount("http://", adapter)
-        
+
         return session
-    
-    def _check_rpc_availability(self) -> bool:
-        """Verifica se função RPC está disponível"""
-        if self._rpc_available is not None:
-            return self._rpc_available
-        
-        try:
-            url = f"{self.url}/rest/v1/rpc/upsert_auctions_v2"
-            r = self.session.post(
-                url,
-                headers=self.headers,
-                json={'items': []},
-                timeout=5
-            )
-            self._rpc_available = r.status_code in (200, 201)
-            
-            if self._rpc_available:
-                print("✅ RPC upsert_auctions_v2 disponível (modo otimizado)")
+
+    def _post(self, url: str, headers: Dict, json_body: Any = None,
+              data: Any = None, timeout: float = 120):
+        """POST com retry/backoff (httpx não tem o Retry do urllib3 embutido)"""
+        if httpx is None:
+            return self.session.post(url, headers=headers, json=json_body,
+                                     data=data, timeout=timeout)
+
+        backoff = 0.5
+        r = None
+        for attempt in range(3):
+            try:
+                r = self.session.post(url, headers=headers, json=json_body,
+                                      content=data, timeout=timeout)
+            except httpx.HTTPError:
+                if attempt == 2:
+                    raise
             else:
-                print("⚠️ RPC não disponível - execute install.sql")
-                
-        except Exception as e:
-            print(f"⚠️ Erro ao verificar RPC: {e}")
-            self._rpc_available = False
-        
-        return self._rpc_available
-    
+                if r.status_code not in RETRY_STATUSES:
+                    return r
+            time.sleep(backoff)
+            backoff *= 2
+        return r
+
+    def _post_json(self, url: str, body: bytes, headers: Dict, timeout: float = 120):
+        """POST de JSON já serializado, comprimindo corpos grandes com gzip
+        (PostgREST aceita Content-Encoding: gzip; JSON típico encolhe 6-10x)"""
+        if len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=3)
+            headers = {**headers, 'Content-Encoding': 'gzip'}
+        return self._post(url, headers=headers, data=body, timeout=timeout)
+
+    @property
+    def _rpc_available(self) -> Optional[bool]:
+        """None = ainda não sondado; resolvido pelo primeiro batch real"""
+        return _RPC_STATUS_CACHE.get(self.url)
+
     def insert_raw(self, source: str, data: Any) -> bool:
         """
-        Método mantido para compatibilidade com scrapers antigos
-        Não faz nada (raw_auctions foi removido)
+        Método mantido para compatibilidade com scrapers antigos.
+        Retorna imediatamente sem nenhuma chamada de rede: a tabela
+        raw_auctions foi removida, então não há I/O para despachar
+        (nem para background thread)
         """
         return True
     
-    def upsert_normalized(self, items: List[Dict]) -> Dict[str, int]:
+    def upsert_normalized(self, items: List[Dict[str, Any]]) -> Dict[str, int]:
         """
         UPSERT otimizado com batching inteligente
         Retorna: {'inserted': X, 'updated': Y, 'errors': Z, 'time_ms': T}
@@ -104,74 +232,130 @@ class SupabaseClient:
             return {'inserted': 0, 'updated': 0, 'errors': 0, 'time_ms': 0}
         
         start_time = time.time()
-        
-        # Se RPC disponível, usar (mais rápido)
-        if self._rpc_available:
-            stats = self._upsert_via_rpc(items)
-        else:
-            print("⚠️ RPC indisponível! Execute install.sql para melhor performance!")
+
+        if self._rpc_available is False:
+            logger.warning("⚠️ RPC indisponível! Execute install.sql para melhor performance!")
             stats = self._upsert_fallback(items)
+        elif self._rpc_available and aiohttp is not None and len(items) > RPC_BATCH_SIZE:
+            # Com aiohttp e mais de um batch, dispara os POSTs em paralelo
+            stats = asyncio.run(self._upsert_via_rpc_async(items))
+        else:
+            # Primeiro upsert do processo sonda o RPC com o próprio batch
+            stats = self._upsert_via_rpc(items)
         
         stats['time_ms'] = int((time.time() - start_time) * 1000)
         
         return stats
     
-    def _upsert_via_rpc(self, items: List[Dict]) -> Dict[str, int]:
+    def _upsert_via_rpc(self, items: List[Dict[str, Any]]) -> Dict[str, int]:
         """Método otimizado usando RPC"""
         url = f"{self.url}/rest/v1/rpc/upsert_auctions_v2"
         
         stats = {'inserted': 0, 'updated': 0, 'errors': 0}
-        batch_size = 500
-        total_batches = (len(items) + batch_size - 1) // batch_size
-        
-        print(f"📦 Processando {len(items)} itens em {total_batches} batches")
-        
-        for i in range(0, len(items), batch_size):
-            batch = items[i:i+batch_size]
-            batch_num = (i // batch_size) + 1
-            
+        batches = _pack_by_size(items)
+        total_batches = len(batches)
+
+        logger.info("📦 Processando %d itens em %d batches (~1MB cada)", len(items), total_batches)
+
+        for batch_num, (batch, body) in enumerate(batches, 1):
             try:
-                r = self.session.post(
-                    url,
-                    headers=self.headers,
-                    json={'items': batch},
-                    timeout=120
-                )
-                
+                r = self._post_json(url, body, headers=self.headers, timeout=120)
+
+                if r.status_code == 404 and self.url not in _RPC_STATUS_CACHE:
+                    # Função RPC não instalada: registra e manda o resto pelo fallback
+                    _RPC_STATUS_CACHE[self.url] = False
+                    logger.warning("⚠️ RPC upsert_auctions_v2 não disponível - execute install.sql")
+                    remaining = [it for b, _ in batches[batch_num - 1:] for it in b]
+                    rest = self._upsert_fallback(remaining)
+                    for key in ('inserted', 'updated', 'errors'):
+                        stats[key] += rest[key]
+                    return stats
+
                 if r.status_code == 200:
+                    _RPC_STATUS_CACHE[self.url] = True
                     result = r.json()
                     stats['inserted'] += result.get('inserted', 0)
                     stats['updated'] += result.get('updated', 0)
                     stats['errors'] += result.get('errors', 0)
                     
                     progress = (batch_num / total_batches) * 100
-                    print(f"   ✅ [{progress:3.0f}%] Batch {batch_num}/{total_batches}: "
-                          f"+{result.get('inserted', 0)} novos, "
-                          f"~{result.get('updated', 0)} atualizados")
+                    logger.info("   ✅ [%3.0f%%] Batch %d/%d: +%d novos, ~%d atualizados",
+                                progress, batch_num, total_batches,
+                                result.get('inserted', 0), result.get('updated', 0))
                 else:
-                    print(f"   ❌ Batch {batch_num}: HTTP {r.status_code}")
+                    logger.error("   ❌ Batch %d: HTTP %s", batch_num, r.status_code)
                     stats['errors'] += len(batch)
-                    
+
             except Exception as e:
-                print(f"   ❌ Batch {batch_num}: {str(e)[:100]}")
+                logger.error("   ❌ Batch %d: %s", batch_num, str(e)[:100])
                 stats['errors'] += len(batch)
         
         total = stats['inserted'] + stats['updated'] + stats['errors']
         success_rate = ((stats['inserted'] + stats['updated']) / total * 100) if total > 0 else 0
-        print(f"\n📊 RESULTADO: {stats['inserted']} novos | "
-              f"{stats['updated']} atualizados | "
-              f"{stats['errors']} erros | "
-              f"{success_rate:.1f}% sucesso")
+        logger.info("📊 RESULTADO: %d novos | %d atualizados | %d erros | %.1f%% sucesso",
+                    stats['inserted'], stats['updated'], stats['errors'], success_rate)
         
         return stats
-    
-    def _upsert_fallback(self, items: List[Dict]) -> Dict[str, int]:
+
+    async def _upsert_via_rpc_async(self, items: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Versão assíncrona do RPC: dispara batches concorrentes com aiohttp"""
+        url = f"{self.url}/rest/v1/rpc/upsert_auctions_v2"
+
+        batches = _pack_by_size(items)
+        stats = {'inserted': 0, 'updated': 0, 'errors': 0}
+        sem = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+
+        logger.info("📦 Processando %d itens em %d batches (paralelo x%d)",
+                    len(items), len(batches), MAX_CONCURRENT_UPLOADS)
+
+        async def post_batch(session, batch_len, body):
+            # Corpo já serializado pelo _pack_by_size (json= do aiohttp usaria
+            # o json.dumps do stdlib, que nem sabe serializar AuctionRow);
+            # mesma regra de gzip do _post_json
+            headers = None
+            if len(body) >= GZIP_MIN_BYTES:
+                body = gzip.compress(body, compresslevel=3)
+                headers = {'Content-Encoding': 'gzip'}
+            async with sem:
+                async with session.post(url, data=body, headers=headers,
+                                        timeout=aiohttp.ClientTimeout(total=120)) as r:
+                    if r.status == 200:
+                        return await r.json(), batch_len
+                    return None, batch_len
+
+        connector = aiohttp.TCPConnector(limit=20)
+        async with aiohttp.ClientSession(connector=connector, headers=self.headers) as session:
+            results = await asyncio.gather(
+                *[post_batch(session, len(b), body) for b, body in batches],
+                return_exceptions=True
+            )
+
+        for i, result in enumerate(results, 1):
+            if isinstance(result, Exception):
+                logger.error("   ❌ Batch %d: %s", i, str(result)[:100])
+                stats['errors'] += len(batches[i-1][0])
+                continue
+
+            body, batch_len = result
+            if body is None:
+                logger.error("   ❌ Batch %d: HTTP error", i)
+                stats['errors'] += batch_len
+            else:
+                stats['inserted'] += body.get('inserted', 0)
+                stats['updated'] += body.get('updated', 0)
+                stats['errors'] += body.get('errors', 0)
+
+        total = stats['inserted'] + stats['updated'] + stats['errors']
+        success_rate = ((stats['inserted'] + stats['updated']) / total * 100) if total > 0 else 0
+        logger.info("📊 RESULTADO: %d novos | %d atualizados | %d erros | %.1f%% sucesso",
+                    stats['inserted'], stats['updated'], stats['errors'], success_rate)
+
+        return stats
+
+    def _upsert_fallback(self, items: List[Dict[str, Any]]) -> Dict[str, int]:
         """Fallback sem RPC"""
         url = f"{self.url}/rest/v1/auctions"
-        
-        upsert_headers = self.headers.copy()
-        upsert_headers['Prefer'] = 'resolution=merge-duplicates,return=minimal'
-        
+
         stats = {'inserted': 0, 'updated': 0, 'errors': 0}
         batch_size = 200
         
@@ -179,59 +363,83 @@ class SupabaseClient:
             batch = items[i:i+batch_size]
             
             try:
-                r = self.session.post(
-                    url,
-                    headers=upsert_headers,
-                    json=batch,
-                    timeout=30
-                )
-                
+                r = self._post_json(url, _json_dumps(batch), headers=self._upsert_headers, timeout=30)
+
                 if r.status_code in (200, 201):
                     stats['inserted'] += len(batch)
-                    print(f"   ✅ Batch {i//batch_size + 1}: {len(batch)} processados")
+                    logger.info("   ✅ Batch %d: %d processados", i//batch_size + 1, len(batch))
                 else:
-                    print(f"   ⚠️ Batch {i//batch_size + 1}: Status {r.status_code}")
+                    logger.warning("   ⚠️ Batch %d: Status %s", i//batch_size + 1, r.status_code)
                     stats['errors'] += len(batch)
                     
             except Exception as e:
-                print(f"   ❌ Erro: {str(e)[:100]}")
+                logger.error("   ❌ Erro: %s", str(e)[:100])
                 stats['errors'] += len(batch)
         
         return stats
     
-    def insert_normalized(self, items: List[Dict]) -> int:
+    def insert_normalized(self, items: List[Dict[str, Any]]) -> int:
         """Método legado - usa upsert_normalized()"""
         result = self.upsert_normalized(items)
         return result['inserted'] + result['updated']
-    
-    def __del__(self):
-        """Fecha session ao destruir objeto"""
-        if hasattr(self, 'session'):
-            self.session.close()
+
+    @classmethod
+    def _close_sessions(cls):
+        """Fecha os clientes compartilhados no fim do processo"""
+        for session in cls._sessions.values():
+            session.close()
+        cls._sessions.clear()
+
+
+atexit.register(SupabaseClient._close_sessions)
 
 
 # ============================================================
 # HELPERS OTIMIZADOS
 # ============================================================
 
-_REGEX_CACHE = {
-    'whitespace': re.compile(r'\s+'),
-    'control_chars': re.compile(r'[\x00-\x1f\x7f-\x9f]'),
-    'state_end': re.compile(r'[-/]\s*([A-Z]{2})\s*$'),
-    'date_iso': re.compile(r'(\d{4}-\d{2}-\d{2})'),
-    'date_br': re.compile(r'(\d{2})/(\d{2})/(\d{4})'),
-    'clean_id': re.compile(r'[^a-zA-Z0-9-]+')
-}
+# Padrões compilados como nomes de módulo: pattern.sub/search direto evita
+# um lookup de dict + hash por chamada nos helpers quentes
+_STATE_END_RE = re.compile(r'[-/]\s*([A-Z]{2})\s*$')
+_DATE_ISO_RE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+_DATE_BR_RE = re.compile(r'(\d{2})/(\d{2})/(\d{4})')
+_CLEAN_ID_RE = re.compile(r'[^a-zA-Z0-9-]+')
 
 _UFS = {'AC','AL','AP','AM','BA','CE','DF','ES','GO','MA','MT','MS','MG',
         'PA','PB','PR','PE','PI','RJ','RN','RS','RO','RR','SC','SP','SE','TO'}
 
+# Autômato Aho-Corasick compilado uma vez para varrer as 27 UFs num único
+# passe C (sentinelas de espaço garantem fronteira de palavra)
+try:
+    import ahocorasick
+    _UF_AUTOMATON = ahocorasick.Automaton()
+    for _uf in _UFS:
+        _UF_AUTOMATON.add_word(f' {_uf} ', _uf)
+    _UF_AUTOMATON.make_automaton()
+except ImportError:
+    _UF_AUTOMATON = None
+
+# Tabela única para clean_text: remove caracteres de controle num só passe C
+# (tab/newline/CR viram espaço; o split/join colapsa as sequências)
+_CLEAN_TABLE = {c: None for c in range(0x20)}
+_CLEAN_TABLE.update({c: None for c in range(0x7f, 0xa0)})
+_CLEAN_TABLE[0x09] = _CLEAN_TABLE[0x0a] = _CLEAN_TABLE[0x0d] = 0x20
+
+
+class _KeepDigitsTable(dict):
+    """Tabela de translate que descarta qualquer caractere fora do dict
+    (__missing__ devolve None = deletar), sem precisar mapear todo o Unicode"""
+    def __missing__(self, key):
+        return None
+
+
+_VALUE_KEEP = _KeepDigitsTable({ord(c): c for c in '0123456789,'})
+
 
 def clean_text(text: Optional[str], max_len: Optional[int] = None) -> Optional[str]:
     if not text:
         return None
-    text = _REGEX_CACHE['whitespace'].sub(' ', str(text)).strip()
-    text = _REGEX_CACHE['control_chars'].sub('', text)
+    text = ' '.join(str(text).translate(_CLEAN_TABLE).split())
     if max_len and len(text) > max_len:
         text = text[:max_len].rsplit(' ', 1)[0] + '...'
     return text if text else None
@@ -240,27 +448,52 @@ def clean_text(text: Optional[str], max_len: Optional[int] = None) -> Optional[s
 def extract_state(text: Optional[str]) -> Optional[str]:
     if not text:
         return None
-    
+
+    # Fast path: endereços quase sempre terminam em " - SP" ou "/SP".
+    # Olhar só a cauda evita o regex e o .upper() da string inteira.
+    tail = text[-5:].upper().replace(' ', '')
+    idx = max(tail.rfind('-'), tail.rfind('/'))
+    if idx != -1 and tail[idx+1:] in _UFS:
+        return tail[idx+1:]
+
     text_upper = text.upper()
-    match = _REGEX_CACHE['state_end'].search(text_upper)
+    match = _STATE_END_RE.search(text_upper)
     if match:
         uf = match.group(1)
         return uf if uf in _UFS else None
     
+    if _UF_AUTOMATON is not None:
+        for _, uf in _UF_AUTOMATON.iter(f' {text_upper} '):
+            return uf
+        return None
+
     for word in text_upper.split():
         if word in _UFS:
             return word
-    
+
     return None
 
 
+# Ano corrente com TTL de 1h: parse_date roda uma vez por linha e cada
+# datetime.now() custa um syscall + alocação de objeto
+_YEAR_CACHE = [datetime.now().year, time.time()]
+
+
+def _current_year() -> int:
+    now = time.time()
+    if now - _YEAR_CACHE[1] > 3600:
+        _YEAR_CACHE[0] = datetime.now().year
+        _YEAR_CACHE[1] = now
+    return _YEAR_CACHE[0]
+
+
 def parse_value(value: Any) -> Optional[float]:
     if value is None:
         return None
     if isinstance(value, (int, float)):
         return float(value)
     if isinstance(value, str):
-        clean = re.sub(r'[^\d,]', '', value).replace(',', '.')
+        clean = value.translate(_VALUE_KEEP).replace(',', '.')
         try:
             return float(clean) if clean else None
         except:
@@ -272,11 +505,11 @@ def parse_date(date_str: Optional[str]) -> Optional[str]:
     if not date_str:
         return None
     
-    match = _REGEX_CACHE['date_iso'].search(date_str)
+    match = _DATE_ISO_RE.search(date_str)
     if match:
         parsed = match.group(1)
     else:
-        match = _REGEX_CACHE['date_br'].search(date_str)
+        match = _DATE_BR_RE.search(date_str)
         if match:
             day, month, year = match.groups()
             parsed = f"{year}-{month}-{day}"
@@ -285,7 +518,7 @@ def parse_date(date_str: Optional[str]) -> Optional[str]:
     
     try:
         year = int(parsed[:4])
-        current_year = datetime.now().year
+        current_year = _current_year()
         if year < (current_year - 2) or year > (current_year + 5):
             return None
         return parsed
@@ -296,7 +529,7 @@ def parse_date(date_str: Optional[str]) -> Optional[str]:
 def generate_clean_external_id(source: str, raw_id: Any) -> str:
     if not raw_id:
         return f"{source}_unknown_{int(time.time() * 1000)}"
-    clean = _REGEX_CACHE['clean_id'].sub('_', str(raw_id).lower())
+    clean = _CLEAN_ID_RE.sub('_', str(raw_id).lower())
     clean = clean.strip('_')[:100]
     return f"{source}_{clean}"
 
@@ -305,78 +538,134 @@ def generate_clean_external_id(source: str, raw_id: Any) -> str:
 # NORMALIZER SUPERBID
 # ============================================================
 
-def normalize_superbid(data: List[Dict]) -> List[Dict]:
+@dataclass(slots=True)
+class AuctionRow:
+    """Linha normalizada de leilão. Slots usam ~200B por item contra ~640B+
+    de um dict de 20 chaves, o que pesa em batches de 100k itens."""
+    source: str
+    external_id: str
+    link: str
+    title: Optional[str]
+    value: Optional[float]
+    address: Optional[str]
+    auction_date: Optional[str]
+    auction_name: Optional[str]
+    auction_type: Optional[str]
+    category: str
+    city: Optional[str]
+    days_remaining: Optional[int]
+    description: Optional[str]
+    description_preview: Optional[str]
+    lot_number: Optional[Any]
+    metadata: Dict[str, Any]
+    state: Optional[str]
+    store_name: str
+    total_bidders: int
+    total_bids: int
+    total_visits: int
+    value_text: Optional[str]
+
+def _arrow_prefilter(data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Filtra validade em colunas Arrow (kernels C++) antes do loop Python"""
+    ext = pa.array([it.get('external_id') for it in data])
+    link = pa.array([it.get('link') for it in data])
+    store = pa.array([it.get('store_name') for it in data])
+
+    has_core = pc.and_(pc.is_valid(ext), pc.is_valid(link))
+    keep = pc.and_(has_core, pc.is_valid(store))
+
+    # "filtered" conta só quem tinha id+link mas veio sem loja (mesma semântica do loop)
+    filtered = pc.sum(has_core).as_py() - pc.sum(keep).as_py()
+    kept = [it for it, ok in zip(data, keep.to_pylist()) if ok]
+    return kept, filtered
+
+
+def normalize_superbid(data: List[Dict[str, Any]]) -> List[AuctionRow]:
     """Normaliza Superbid - versão otimizada"""
-    results = []
+    results: List[AuctionRow] = []
     filtered = 0
-    
+
+    if pa is not None and len(data) >= _ARROW_MIN_BATCH:
+        data, filtered = _arrow_prefilter(data)
+
     for item in data:
         external_id = item.get('external_id')
         link = item.get('link')
         store_name = item.get('store_name')
-        
+
         if not external_id or not link:
             continue
-        
+
         if not store_name:
             filtered += 1
             continue
-        
+
+        # Estado (validado aqui para não alocar a linha de quem será descartado)
+        state = item.get('state') or extract_state(item.get('address', ''))
+        if state and len(state) != 2:
+            continue
+
         # Parse de data
         auction_date = item.get('auction_date')
         if auction_date and isinstance(auction_date, str):
-            try:
-                auction_date = auction_date.replace('Z', '+00:00')
-                dt = datetime.fromisoformat(auction_date)
-                auction_date = dt.strftime('%Y-%m-%d %H:%M:%S%z')
-            except:
-                auction_date = None
-        
-        # Estado
-        state = item.get('state') or extract_state(item.get('address', ''))
-        
-        results.append({
-            'source': 'superbid',
-            'external_id': external_id,
-            'link': link,
-            'title': clean_text(item.get('title'), 200),
-            'value': item.get('value'),
-            'address': item.get('address'),
-            'auction_date': auction_date,
-            'auction_name': item.get('auction_name'),
-            'auction_type': item.get('auction_type'),
-            'category': item.get('category', 'outros'),
-            'city': item.get('city'),
-            'days_remaining': item.get('days_remaining'),
-            'description': item.get('description'),
-            'description_preview': item.get('description_preview'),
-            'lot_number': item.get('lot_number'),
-            'metadata': item.get('metadata', {}),
-            'state': state,
-            'store_name': store_name,
-            'total_bidders': item.get('total_bidders', 0),
-            'total_bids': item.get('total_bids', 0),
-            'total_visits': item.get('total_visits', 0),
-            'value_text': item.get('value_text'),
-        })
+            if len(auction_date) == 20 and auction_date[10] == 'T' and auction_date[-1] == 'Z':
+                # Formato padrão do Superbid (2024-01-15T13:45:00Z):
+                # recorte direto evita fromisoformat + strftime por item
+                auction_date = auction_date[:10] + ' ' + auction_date[11:19] + '+0000'
+            else:
+                try:
+                    auction_date = auction_date.replace('Z', '+00:00')
+                    dt = datetime.fromisoformat(auction_date)
+                    auction_date = dt.strftime('%Y-%m-%d %H:%M:%S%z')
+                except:
+                    auction_date = None
+
+        results.append(AuctionRow(
+            source='superbid',
+            external_id=external_id,
+            link=link,
+            title=clean_text(item.get('title'), 200),
+            value=item.get('value'),
+            address=item.get('address'),
+            auction_date=auction_date,
+            auction_name=item.get('auction_name'),
+            auction_type=item.get('auction_type'),
+            category=item.get('category', 'outros'),
+            city=item.get('city'),
+            days_remaining=item.get('days_remaining'),
+            description=item.get('description'),
+            description_preview=item.get('description_preview'),
+            lot_number=item.get('lot_number'),
+            metadata=item.get('metadata', {}),
+            state=state,
+            store_name=store_name,
+            total_bidders=item.get('total_bidders', 0),
+            total_bids=item.get('total_bids', 0),
+            total_visits=item.get('total_visits', 0),
+            value_text=item.get('value_text'),
+        ))
     
     if filtered > 0:
-        print(f"🚫 Filtrados {filtered} itens inválidos")
+        logger.info("🚫 Filtrados %d itens inválidos", filtered)
     
     return results
 
 
-def normalize(source: str, data: Any) -> List[Dict]:
+def normalize(source: str, data: Any) -> List[AuctionRow]:
     """Normaliza dados de qualquer fonte"""
     if source.lower() != 'superbid':
         raise ValueError(f"Fonte não suportada: {source}")
-    
+
+    # normalize_superbid já valida tudo antes de alocar cada linha;
+    # aqui só resta o dedup por external_id (feeds paginados sobrepõem itens,
+    # last-write-wins evita trabalho de merge/409 no servidor)
     normalized = normalize_superbid(data)
-    
-    # Validação final
-    return [
-        item for item in normalized
-        if item.get('external_id') 
-        and item.get('link')
-        and (not item.get('state') or len(item['state']) == 2)
-    ]
+
+    seen: Dict[str, AuctionRow] = {}
+    for row in normalized:
+        seen[row.external_id] = row
+
+    if len(seen) < len(normalized):
+        logger.info("🔁 Removidos %d duplicados no batch", len(normalized) - len(seen))
+
+    return list(seen.values())
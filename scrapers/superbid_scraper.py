@@ -5,15 +5,67 @@ SUPERBID SCRAPER - VERSÃO CORRIGIDA v2
 Correção: Tratamento de None nos campos de texto
 """
 
+import re
 import json
 import time
 import requests
 import os
 import sys
 import random
-from datetime import datetime
+import asyncio
+import logging
+import queue
+import threading
+from collections import deque
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
+from urllib3.util.retry import Retry
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(raw: bytes):
+    """Parse de JSON ~5x mais rápido com orjson (fallback stdlib)
+
+    Avaliamos msgspec.Struct (parse direto para objetos tipados) como
+    alternativa, mas o payload da API muda de forma com frequência —
+    campos aninhados somem/aparecem entre ofertas — e os .get() em dicts
+    toleram isso de graça; schemas tipados exigiriam manutenção a cada
+    mudança. Ficamos com orjson + dicts."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# Só anuncia 'br' se o decodificador existir, senão a resposta viria
+# comprimida e o parse de JSON quebraria
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    _ACCEPT_ENCODING = "gzip, deflate"
+
+
+# Parser ISO ~10x mais rápido quando ciso8601 está instalado
+try:
+    from ciso8601 import parse_datetime as _parse_iso
+except ImportError:
+    def _parse_iso(s):
+        return datetime.fromisoformat(s.replace('Z', '+00:00')) if s else None
+
+# Logger lazy: com %s o format só roda se o nível estiver habilitado,
+# e subir para WARNING zera o custo de I/O das mensagens por página
+logger = logging.getLogger("superbid")
 
 BASE_URL = "https://exchange.superbid.net"
 API_BASE = "https://offer-query.superbid.net"
@@ -23,11 +75,28 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 MAX_EXECUTION_TIME = 10680
 SAVE_CHECKPOINT_EVERY = 1000
 REQUEST_TIMEOUT = 45
-REQUEST_DELAY_MIN = 2
-REQUEST_DELAY_MAX = 5
+# Teto de requisições/segundo do token-bucket: ritmo constante bem acima
+# da média antiga de ~0.3 req/s (sleep de 2-5s por página), mas sem os
+# picos que disparavam 429
+RATE_LIMIT_RPS = 2
 CATEGORY_DELAY_MIN = 10
 CATEGORY_DELAY_MAX = 20
 
+# Busca assíncrona de páginas (quando aiohttp está instalado)
+PAGE_BATCH_SIZE = 8
+MAX_CONNECTIONS = 32
+
+# Filtro server-side: "openedAll" pede só ofertas abertas à API, então o
+# check de endDate no cliente é rede de segurança, não o filtro principal.
+# (Há um searchType "opened" não documentado; sem confirmação de que retorna
+# o mesmo conjunto, ficamos no openedAll)
+SEARCH_TYPE = "openedAll"
+
+# Padrões de oferta de teste: search com re.I compilado dispensa o .lower()
+# (e a alocação da cópia minúscula) por campo em cada oferta
+_DEMO_RE = re.compile(r"demo", re.I)
+_DEPLOY_RE = re.compile(r"deploy", re.I)
+
 CATEGORIES = {
     "carros-motos": "Carros & Motos",
     "caminhoes-onibus": "Caminhões & Ônibus",
@@ -54,16 +123,58 @@ CATEGORIES = {
 class SuperbidScraper:
     def __init__(self):
         self.session = requests.Session()
+
+        # Pool maior + retry do urllib3: reusa conexões TLS entre páginas e
+        # trata 429/5xx com backoff sem a escada manual de retries no loop
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=1.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"]
+            )
+        )
+        self.session.mount("https://", adapter)
+
         self.headers = {
             "accept": "*/*",
+            "accept-encoding": _ACCEPT_ENCODING,
             "accept-language": "pt-BR,pt;q=0.9",
+            "connection": "keep-alive",
             "origin": BASE_URL,
             "referer": f"{BASE_URL}/",
             "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
         }
         self.start_time = time.time()
+        # Timestamps das últimas requisições (janela de 1s do token-bucket)
+        self._bucket = deque()
         self.should_stop = False
         self.max_retries = 3
+        # JSON identado só sob demanda (--pretty): pretty-print materializa
+        # a string inteira e pesa em checkpoints de dezenas de MB
+        self.pretty_json = False
+        # Ids já coletados: dedup O(1) por oferta em vez de reconstruir
+        # dicts {external_id: oferta} a cada checkpoint (O(N) por vez)
+        self._seen_ids = set()
+        # Worker único de I/O: gravações e uploads saem da thread de
+        # scraping mas continuam em ordem (um consumidor só); a fila
+        # limitada dá backpressure se o disco/rede não acompanhar
+        self._sink_q = queue.Queue(maxsize=4)
+        self._sink_thread = threading.Thread(target=self._sink_worker, daemon=True)
+        self._sink_thread.start()
+        # Buffer de upload: categorias pequenas são agrupadas num flush só,
+        # menos round trips HTTPS para o mesmo volume de linhas
+        self._pending_upload: List[Dict] = []
+        self._upload_threshold = 5000
+        # Checkpoints NDJSON em append: um arquivo por categoria/run,
+        # bytes gravados por checkpoint são O(itens novos), não O(total)
+        self._run_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self._written_ids = set()
+        # Páginas por categoria da última run: a contagem é estável entre
+        # runs, então o primeiro lote paralelo já sai do tamanho certo
+        self._page_hints = self._load_page_hints()
         self.filtered_stats = {
             'demo_seller': 0,
             'demo_auctioneer': 0,
@@ -71,6 +182,57 @@ class SuperbidScraper:
             'no_store': 0
         }
     
+    def _load_page_hints(self) -> Dict[str, int]:
+        try:
+            with open(OUTPUT_DIR / ".page_hints.json", "rb") as f:
+                return _json_loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def _update_page_hint(self, category_slug: str, last_page: int):
+        """Grava a última página com ofertas para dimensionar a próxima run"""
+        if last_page <= 0:
+            return
+        self._page_hints[category_slug] = last_page
+        try:
+            with open(OUTPUT_DIR / ".page_hints.json", "w", encoding="utf-8") as f:
+                json.dump(self._page_hints, f)
+        except OSError:
+            pass
+
+    def queue_upload(self, normalized: List[Dict]):
+        """Acumula itens normalizados e só envia ao atingir o limiar"""
+        self._pending_upload.extend(normalized)
+        if len(self._pending_upload) >= self._upload_threshold:
+            self.flush_uploads()
+
+    def flush_uploads(self):
+        """Despacha o buffer pendente para o worker de I/O"""
+        if not self._pending_upload:
+            return
+        batch = self._pending_upload
+        self._pending_upload = []
+        logger.info("   📤 Flush: %s itens para o Supabase...", len(batch))
+        self._sink_q.put(('upload', batch))
+
+    def _sink_worker(self):
+        """Consome a fila de I/O: ('save', dados, arquivo), ('append', itens,
+        arquivo) e ('upload', itens). None encerra o worker."""
+        while True:
+            msg = self._sink_q.get()
+            if msg is None:
+                break
+            try:
+                kind = msg[0]
+                if kind == 'save':
+                    self._write_json(msg[1], msg[2])
+                elif kind == 'append':
+                    self._append_ndjson(msg[1], msg[2])
+                elif kind == 'upload':
+                    upload_to_supabase(msg[1])
+            except Exception as e:
+                logger.error("   ❌ Erro no worker de I/O: %s", e)
+
     def check_timeout(self) -> bool:
         elapsed = time.time() - self.start_time
         return elapsed > MAX_EXECUTION_TIME or self.should_stop
@@ -78,88 +240,296 @@ class SuperbidScraper:
     def random_delay(self, min_sec: float, max_sec: float, reason: str = ""):
         delay = random.uniform(min_sec, max_sec)
         if reason:
-            print(f"   ⏳ {reason} ({delay:.1f}s)...")
+            logger.info("   ⏳ %s (%.1fs)...", reason, delay)
         time.sleep(delay)
-    
+
+    def _throttle(self, n: int = 1):
+        """Token-bucket: garante no máximo RATE_LIMIT_RPS requisições por
+        segundo, dormindo só o necessário (sem o jitter de 2-5s por página).
+        Com n > 1 reserva vaga para um lote inteiro antes de dispará-lo."""
+        bucket = self._bucket
+        for _ in range(n):
+            now = time.monotonic()
+            while bucket and now - bucket[0] >= 1.0:
+                bucket.popleft()
+            if len(bucket) >= RATE_LIMIT_RPS:
+                time.sleep(max(0.0, 1.0 - (now - bucket[0])))
+                now = time.monotonic()
+                while bucket and now - bucket[0] >= 1.0:
+                    bucket.popleft()
+            bucket.append(now)
+
+
     def is_test_offer(self, offer: dict) -> Tuple[bool, str]:
         """
         Verifica se a oferta é de teste/demo
         Retorna: (is_test, reason)
+        Checks ordenados do mais barato/frequente para o mais caro
         """
-        seller = offer.get("seller", {})
-        auction = offer.get("auction", {})
-        product = offer.get("product", {})
-        store = offer.get("store", {})
-        
-        # 1. Verifica store_name NULL
-        store_name = store.get("name")
-        if not store_name:
+        # 1. Verifica store_name NULL (um get, sem varredura de string)
+        store = offer.get("store") or {}
+        if not store.get("name"):
             return True, "no_store"
-        
-        # 2. Verifica "Vendedor Demo" - COM PROTEÇÃO CONTRA None
-        seller_name = seller.get("name") or ""
-        seller_name = seller_name.lower() if seller_name else ""
-        if "vendedor demo" in seller_name or "demo" in seller_name:
+
+        # 2. Verifica "Vendedor Demo" ("demo" cobre todas as variantes)
+        seller = offer.get("seller") or {}
+        if _DEMO_RE.search(seller.get("name") or ""):
             return True, "demo_seller"
-        
-        # 3. Verifica "Corretor Demo" ou "Leiloeiro Demo" - COM PROTEÇÃO CONTRA None
-        auctioneer = auction.get("auctioneer") or ""
-        auctioneer = auctioneer.lower() if auctioneer else ""
-        if "demo" in auctioneer or "corretor demo" in auctioneer or "leiloeiro demo" in auctioneer:
+
+        # 3. Verifica "Corretor Demo" ou "Leiloeiro Demo"
+        auction = offer.get("auction") or {}
+        if _DEMO_RE.search(auction.get("auctioneer") or ""):
             return True, "demo_auctioneer"
-        
-        # 4. Verifica "deploy" no título ou descrição - COM PROTEÇÃO CONTRA None
-        title = product.get("shortDesc") or ""
-        title = title.lower() if title else ""
-        
-        description = offer.get("offerDescription", {}).get("offerDescription") or ""
-        description = description.lower() if description else ""
-        
-        if "deploy" in title or "deploy" in description:
+
+        # 4. Verifica "deploy" no título ou descrição (descrição por último:
+        # é o campo maior e quase nunca decide sozinho)
+        product = offer.get("product") or {}
+        if _DEPLOY_RE.search(product.get("shortDesc") or ""):
             return True, "deploy_text"
-        
+
+        description = (offer.get("offerDescription") or {}).get("offerDescription") or ""
+        if _DEPLOY_RE.search(description):
+            return True, "deploy_text"
+
         return False, ""
     
-    def fetch_category_offers(self, category_slug: str, max_pages: int = None) -> List[dict]:
-        print(f"\n📦 {CATEGORIES.get(category_slug, category_slug)}")
-        
+    def _page_params(self, category_slug: str, page: int) -> Dict:
+        return {
+            "urlSeo": f"{BASE_URL}/categorias/{category_slug}",
+            "locale": "pt_BR",
+            "orderBy": "offerDetail.percentDiffReservedPriceOverFipePrice:asc",
+            "pageNumber": page,
+            "pageSize": 100,
+            "portalId": "[2,15]",
+            "preOrderBy": "orderByFirstOpenedOffersAndSecondHasPhoto",
+            "requestOrigin": "marketplace",
+            "searchType": SEARCH_TYPE,
+            "timeZoneId": "America/Sao_Paulo",
+        }
+
+    def _filter_page_offers(self, page_offers: List[dict], local_filtered: Dict[str, int]) -> List[dict]:
+        """Filtra ofertas de teste/demo e encerradas de uma página"""
+        active = []
+        # Um timestamp por página: datetime.now(tz) por oferta é um syscall
+        # + conversão de tz cada vez, e comparações aware independem do fuso
+        now_utc = datetime.now(timezone.utc)
+
+        # Liga atributos a locais: LOAD_FAST em vez de LOAD_ATTR em self
+        # repetido centenas de vezes por página
+        seen_ids = self._seen_ids
+        is_test_offer = self.is_test_offer
+        filtered_stats = self.filtered_stats
+        append_active = active.append
+        parse_iso = _parse_iso
+
+        for offer in page_offers:
+            offer_id = offer.get("id")
+            if offer_id in seen_ids:
+                continue
+
+            is_test, reason = is_test_offer(offer)
+            if is_test:
+                local_filtered[reason] += 1
+                filtered_stats[reason] += 1
+                continue
+
+            seen_ids.add(offer_id)
+            end_date = offer.get("endDate")
+            if end_date:
+                try:
+                    end_dt = parse_iso(end_date)
+                    # Cacheia o parse: a normalização reusa em vez de re-parsear
+                    offer["_end_dt"] = end_dt
+                    ref_now = now_utc if end_dt.tzinfo is not None else datetime.now()
+                    if end_dt > ref_now:
+                        append_active(offer)
+                except:
+                    append_active(offer)
+            else:
+                append_active(offer)
+        return active
+
+    async def _fetch_pages_async(self, session, category_slug: str, pages: List[int]) -> Dict[int, Tuple[Optional[int], Optional[dict]]]:
+        """Busca um lote de páginas em paralelo; devolve {página: (status, payload)}.
+        Cada página tenta até max_retries vezes com backoff, como o loop
+        sequencial — um erro transitório não custa o lote inteiro"""
+        url = f"{API_BASE}/seo/offers/"
+
+        async def fetch_one(page):
+            params = {k: str(v) for k, v in self._page_params(category_slug, page).items()}
+            status = None
+            for attempt in range(self.max_retries):
+                try:
+                    async with session.get(url, params=params,
+                                           timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)) as r:
+                        status = r.status
+                        if status == 404:
+                            return page, 404, None
+                        if status == 200:
+                            raw = await r.read()
+                            # Página vazia: prefixo dos bytes dispensa o parse completo
+                            if b'"offers":[]' in raw[:200]:
+                                return page, 200, {"offers": []}
+                            return page, 200, _json_loads(raw)
+                except Exception:
+                    status = None
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(1.5 * (attempt + 1))
+            return page, status, None
+
+        results = await asyncio.gather(*[fetch_one(p) for p in pages])
+        return {page: (status, data) for page, status, data in results}
+
+    def _fetch_category_offers_batched(self, category_slug: str, max_pages: int = None) -> List[dict]:
+        """Variante assíncrona: pede PAGE_BATCH_SIZE páginas de uma vez,
+        com o token-bucket segurando o ritmo médio entre lotes"""
+        return asyncio.run(self._fetch_category_batched(category_slug, max_pages))
+
+    async def _fetch_category_batched(self, category_slug: str, max_pages: int = None) -> List[dict]:
         offers = []
         page = 1
+        last_page = 0
+        checkpoint_counter = 0
+        consecutive_errors = 0
+        local_filtered = {'demo_seller': 0, 'demo_auctioneer': 0, 'deploy_text': 0, 'no_store': 0}
+        done = False
+        hint = self._page_hints.get(category_slug)
+
+        # Uma sessão (e um pool keep-alive) para a categoria inteira: abrir
+        # por lote pagaria handshake TLS novo a cada PAGE_BATCH_SIZE páginas
+        connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, keepalive_timeout=30)
+        async with aiohttp.ClientSession(connector=connector, headers=self.headers) as session:
+            while not done and not self.check_timeout():
+                batch_size = PAGE_BATCH_SIZE
+                if page == 1 and hint:
+                    # Primeiro lote do tamanho que a última run provou existir
+                    # (teto nas conexões do pool); além disso volta à sondagem
+                    # normal de PAGE_BATCH_SIZE em PAGE_BATCH_SIZE
+                    batch_size = min(max(hint, PAGE_BATCH_SIZE), MAX_CONNECTIONS)
+                batch_end = page + batch_size - 1
+                if max_pages:
+                    batch_end = min(batch_end, max_pages)
+                if batch_end < page:
+                    logger.info("   ✅ Limite de %s páginas atingido", max_pages)
+                    break
+
+                pages = list(range(page, batch_end + 1))
+                # Reserva vaga no token-bucket para o lote inteiro: o ritmo médio
+                # fica em RATE_LIMIT_RPS mesmo com as páginas saindo em paralelo
+                self._throttle(len(pages))
+                results = await self._fetch_pages_async(session, category_slug, pages)
+
+                for p in pages:
+                    status, data = results.get(p, (None, None))
+
+                    if status == 404:
+                        logger.info("   ✅ Fim: página %s retornou 404", p)
+                        done = True
+                        break
+
+                    if data is None:
+                        # Retries da página já se esgotaram; não joga fora as
+                        # demais páginas do lote por causa de um erro isolado
+                        consecutive_errors += 1
+                        logger.warning("   ⚠️ Erro na página %s (status %s) (%s/%s)",
+                                       p, status, consecutive_errors, self.max_retries)
+                        if consecutive_errors >= self.max_retries:
+                            done = True
+                            break
+                        continue
+
+                    page_offers = data.get("offers", [])
+                    if not page_offers:
+                        logger.info("   ✅ Fim: página %s vazia", p)
+                        done = True
+                        break
+
+                    consecutive_errors = 0
+                    last_page = p
+                    active = self._filter_page_offers(page_offers, local_filtered)
+                    offers.extend(self.normalize_batch(active, category_slug))
+                    logger.info("   Pág %s: +%s válidos | Total: %s", p, len(active), len(offers))
+
+                    if len(page_offers) < 10:
+                        logger.info("   ✅ Fim: Última página com %s ofertas", len(page_offers))
+                        done = True
+                        break
+
+                    if len(offers) >= (checkpoint_counter + 1) * SAVE_CHECKPOINT_EVERY:
+                        checkpoint_counter += 1
+                        self.save_checkpoint(offers, category_slug, checkpoint_counter)
+
+                if max_pages and batch_end >= max_pages and not done:
+                    logger.info("   ✅ Limite de %s páginas atingido", max_pages)
+                    break
+
+                page = batch_end + 1
+
+        self._update_page_hint(category_slug, last_page)
+        self._print_category_stats(local_filtered, offers)
+        return offers
+
+    def _print_category_stats(self, local_filtered: Dict[str, int], offers: List[dict]):
+        total_filtered = sum(local_filtered.values())
+        if total_filtered > 0:
+            logger.info("   🚫 Filtrados nesta categoria: %s", total_filtered)
+            if local_filtered['no_store'] > 0:
+                logger.info("      • Sem loja: %s", local_filtered['no_store'])
+            if local_filtered['demo_seller'] > 0:
+                logger.info("      • Vendedor Demo: %s", local_filtered['demo_seller'])
+            if local_filtered['demo_auctioneer'] > 0:
+                logger.info("      • Leiloeiro Demo: %s", local_filtered['demo_auctioneer'])
+            if local_filtered['deploy_text'] > 0:
+                logger.info("      • Texto 'deploy': %s", local_filtered['deploy_text'])
+
+        logger.info("   📊 Total coletado: %s ofertas válidas", len(offers))
+
+    def fetch_category_offers(self, category_slug: str, max_pages: int = None) -> List[Dict]:
+        """Coleta uma categoria e devolve as ofertas JÁ normalizadas
+        (cada oferta é normalizada exatamente uma vez, na coleta)"""
+        logger.info("\n📦 %s", CATEGORIES.get(category_slug, category_slug))
+
+        # Com aiohttp instalado, busca as páginas em lotes paralelos
+        if aiohttp is not None:
+            return self._fetch_category_offers_batched(category_slug, max_pages)
+
+        offers = []
+        page = 1
+        last_page = 0
         checkpoint_counter = 0
         consecutive_errors = 0
         local_filtered = {'demo_seller': 0, 'demo_auctioneer': 0, 'deploy_text': 0, 'no_store': 0}
         
         while not self.check_timeout():
             if max_pages and page > max_pages:
-                print(f"   ✅ Limite de {max_pages} páginas atingido")
+                logger.info("   ✅ Limite de %s páginas atingido", max_pages)
                 break
             
             url = f"{API_BASE}/seo/offers/"
-            params = {
-                "urlSeo": f"{BASE_URL}/categorias/{category_slug}",
-                "locale": "pt_BR",
-                "orderBy": "offerDetail.percentDiffReservedPriceOverFipePrice:asc",
-                "pageNumber": page,
-                "pageSize": 100,
-                "portalId": "[2,15]",
-                "preOrderBy": "orderByFirstOpenedOffersAndSecondHasPhoto",
-                "requestOrigin": "marketplace",
-                "searchType": "openedAll",
-                "timeZoneId": "America/Sao_Paulo",
-            }
+            params = self._page_params(category_slug, page)
             
             try:
+                self._throttle()
                 r = self.session.get(url, params=params, headers=self.headers, timeout=REQUEST_TIMEOUT)
                 
                 if r.status_code == 404:
-                    print(f"   ✅ Fim: página {page} retornou 404")
+                    logger.info("   ✅ Fim: página %s retornou 404", page)
                     break
                 
                 if r.status_code == 200:
+                    body = r.content
+
+                    # Fim de paginação: o prefixo dos bytes denuncia a página
+                    # vazia sem pagar o parse do corpo inteiro
+                    if b'"offers":[]' in body[:200]:
+                        logger.info("   ✅ Fim: página %s vazia", page)
+                        break
+
                     try:
-                        data = r.json()
-                    except json.JSONDecodeError:
-                        print(f"   ⚠️ Erro JSON na página {page}")
+                        # r.content direto evita a detecção de charset do requests
+                        data = _json_loads(body)
+                    except ValueError:
+                        logger.warning("   ⚠️ Erro JSON na página %s", page)
                         consecutive_errors += 1
                         if consecutive_errors >= self.max_retries:
                             break
@@ -168,36 +538,17 @@ class SuperbidScraper:
                     page_offers = data.get("offers", [])
                     
                     if not page_offers or len(page_offers) == 0:
-                        print(f"   ✅ Fim: página {page} vazia")
+                        logger.info("   ✅ Fim: página %s vazia", page)
                         break
                     
-                    # Filtra ofertas de teste e ativas
-                    active = []
-                    for offer in page_offers:
-                        # Verifica se é teste/demo
-                        is_test, reason = self.is_test_offer(offer)
-                        if is_test:
-                            local_filtered[reason] += 1
-                            self.filtered_stats[reason] += 1
-                            continue
-                        
-                        # Verifica se está ativa
-                        end_date = offer.get("endDate")
-                        if end_date:
-                            try:
-                                end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                                if end_dt > datetime.now(end_dt.tzinfo):
-                                    active.append(offer)
-                            except:
-                                active.append(offer)
-                        else:
-                            active.append(offer)
-                    
-                    offers.extend(active)
-                    print(f"   Pág {page}: +{len(active)} válidos | Total: {len(offers)}")
+                    # Filtra ofertas de teste e ativas, já normalizando a página
+                    last_page = page
+                    active = self._filter_page_offers(page_offers, local_filtered)
+                    offers.extend(self.normalize_batch(active, category_slug))
+                    logger.info("   Pág %s: +%s válidos | Total: %s", page, len(active), len(offers))
                     
                     if len(page_offers) < 10:
-                        print(f"   ✅ Fim: Última página com {len(page_offers)} ofertas")
+                        logger.info("   ✅ Fim: Última página com %s ofertas", len(page_offers))
                         break
                     
                     if len(offers) >= (checkpoint_counter + 1) * SAVE_CHECKPOINT_EVERY:
@@ -206,17 +557,11 @@ class SuperbidScraper:
                     
                     page += 1
                     consecutive_errors = 0
-                    self.random_delay(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX, "Próxima página")
-                    
-                elif r.status_code == 429:
-                    wait_time = random.randint(15, 30)
-                    print(f"   ⚠️ Rate limit, aguardando {wait_time}s...")
-                    time.sleep(wait_time)
-                    consecutive_errors += 1
-                    if consecutive_errors >= self.max_retries:
-                        break
+
                 else:
-                    print(f"   ⚠️ Status {r.status_code} na página {page}")
+                    # 429/5xx já passaram pelo Retry do adapter com backoff;
+                    # chegar aqui significa que as tentativas se esgotaram
+                    logger.warning("   ⚠️ Status %s na página %s", r.status_code, page)
                     consecutive_errors += 1
                     if consecutive_errors >= self.max_retries:
                         break
@@ -224,47 +569,51 @@ class SuperbidScraper:
             except requests.exceptions.Timeout:
                 consecutive_errors += 1
                 wait_time = random.randint(10, 20)
-                print(f"   ⚠️ Timeout na página {page} ({consecutive_errors}/{self.max_retries})")
+                logger.warning("   ⚠️ Timeout na página %s (%s/%s)", page, consecutive_errors, self.max_retries)
                 if consecutive_errors >= self.max_retries:
                     break
                 time.sleep(wait_time)
             except Exception as e:
                 consecutive_errors += 1
-                print(f"   ❌ Erro na página {page}: {e}")
+                logger.error("   ❌ Erro na página %s: %s", page, e)
                 if consecutive_errors >= self.max_retries:
                     break
                 time.sleep(random.randint(10, 20))
         
         if self.check_timeout():
-            print(f"\n⏰ Timeout global na página {page}")
-        
+            logger.info("\n⏰ Timeout global na página %s", page)
+
         # Mostra estatísticas de filtros da categoria
-        total_filtered = sum(local_filtered.values())
-        if total_filtered > 0:
-            print(f"   🚫 Filtrados nesta categoria: {total_filtered}")
-            if local_filtered['no_store'] > 0:
-                print(f"      • Sem loja: {local_filtered['no_store']}")
-            if local_filtered['demo_seller'] > 0:
-                print(f"      • Vendedor Demo: {local_filtered['demo_seller']}")
-            if local_filtered['demo_auctioneer'] > 0:
-                print(f"      • Leiloeiro Demo: {local_filtered['demo_auctioneer']}")
-            if local_filtered['deploy_text'] > 0:
-                print(f"      • Texto 'deploy': {local_filtered['deploy_text']}")
-        
-        print(f"   📊 Total coletado: {len(offers)} ofertas válidas")
+        self._update_page_hint(category_slug, last_page)
+        self._print_category_stats(local_filtered, offers)
         return offers
     
-    def save_checkpoint(self, offers: List[dict], category_slug: str, checkpoint_num: int):
-        normalized = [self.normalize_to_schema(o, category_slug) for o in offers]
-        unique = {o["external_id"]: o for o in normalized}
-        normalized = list(unique.values())
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"superbid_{category_slug}_ckpt{checkpoint_num}_{timestamp}.json"
-        self.save_json(normalized, filename)
-        
-        print(f"   💾 Checkpoint {checkpoint_num}: enviando {len(normalized)} itens...")
-        upload_to_supabase(normalized)
+    def save_checkpoint(self, normalized: List[Dict], category_slug: str, checkpoint_num: int):
+        # Recebe itens já normalizados na coleta; grava e envia apenas o
+        # que ainda não entrou em checkpoint nenhum
+        new_items = [o for o in normalized if o["external_id"] not in self._written_ids]
+        if not new_items:
+            return
+
+        self._written_ids.update(o["external_id"] for o in new_items)
+        self._sink_q.put(('append', new_items, f"superbid_{category_slug}_{self._run_ts}.ndjson"))
+
+        logger.info("   💾 Checkpoint %s: +%s itens na fila de upload...", checkpoint_num, len(new_items))
+        self.queue_upload(new_items)
+
+    def _append_ndjson(self, items: List[Dict], filename: str):
+        """Checkpoint incremental: um objeto JSON por linha, modo append.
+        Recuperação: [_json_loads(l) for l in open(f, 'rb')]"""
+        filepath = OUTPUT_DIR / filename
+        with open(filepath, "ab") as f:
+            if orjson is not None:
+                for item in items:
+                    f.write(orjson.dumps(item, default=str) + b"\n")
+            else:
+                for item in items:
+                    f.write(json.dumps(item, ensure_ascii=False, default=str).encode('utf-8') + b"\n")
+        logger.info("   💾 Checkpoint: +%s itens em %s", len(items), filepath)
+        return filepath
     
     def extract_city_state(self, city_text: str) -> Tuple[Optional[str], Optional[str]]:
         if not city_text:
@@ -288,17 +637,37 @@ class SuperbidScraper:
         
         return city, state
     
-    def normalize_to_schema(self, offer: dict, category_slug: str) -> Dict:
+    def normalize_batch(self, offers: List[dict], category_slug: str) -> List[Dict]:
+        """Normaliza uma página/lista de uma vez: iça os lookups invariantes
+        (categoria, timestamp) para fora do loop e pré-dedupa por id para não
+        montar o dict de metadata de ofertas repetidas"""
+        category = CATEGORIES.get(category_slug, "Outros")
+        now = datetime.now(timezone.utc)
+
+        seen_ids = set()
+        results = []
+        for offer in offers:
+            offer_id = offer.get("id")
+            if offer_id in seen_ids:
+                continue
+            seen_ids.add(offer_id)
+            results.append(self.normalize_to_schema(offer, category_slug,
+                                                    category=category, now=now))
+        return results
+
+    def normalize_to_schema(self, offer: dict, category_slug: str,
+                            category: str = None, now: datetime = None) -> Dict:
         product = offer.get("product", {})
         auction = offer.get("auction", {})
         detail = offer.get("offerDetail", {})
         seller = offer.get("seller", {})
         store = offer.get("store", {})
-        
+
         offer_id = str(offer.get("id"))
-        external_id = f"superbid_{offer_id}"
+        external_id = "superbid_" + offer_id
         title = product.get("shortDesc", "Sem título").strip()
-        category = CATEGORIES.get(category_slug, "Outros")
+        if category is None:
+            category = CATEGORIES.get(category_slug, "Outros")
         
         value = detail.get("currentMinBid") or detail.get("initialBidValue")
         value_text = detail.get("currentMinBidFormatted") or detail.get("initialBidValueFormatted")
@@ -315,8 +684,12 @@ class SuperbidScraper:
         
         if end_date_str:
             try:
-                auction_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
-                days_remaining = max(0, (auction_date - datetime.now(auction_date.tzinfo)).days)
+                auction_date = offer.get("_end_dt") or _parse_iso(end_date_str)
+                if now is not None and auction_date.tzinfo is not None:
+                    ref_now = now
+                else:
+                    ref_now = datetime.now(auction_date.tzinfo)
+                days_remaining = max(0, (auction_date - ref_now).days)
             except:
                 pass
         
@@ -386,69 +759,75 @@ class SuperbidScraper:
         }
     
     def scrape_all(self, max_pages: int = None) -> List[Dict]:
-        print("\n" + "="*60)
-        print("🚀 SUPERBID - SCRAPING COMPLETO")
-        print("="*60)
+        logger.info("\n%s", "=" * 60)
+        logger.info("🚀 SUPERBID - SCRAPING COMPLETO")
+        logger.info("=" * 60)
         
         all_offers = []
         category_count = 0
         
         for slug, name in CATEGORIES.items():
             if self.check_timeout():
-                print("\n⏰ Timeout global")
+                logger.info("\n⏰ Timeout global")
                 break
             
             category_count += 1
-            print(f"\n📋 Categoria {category_count}/{len(CATEGORIES)}: {name}")
+            logger.info("\n📋 Categoria %s/%s: %s", category_count, len(CATEGORIES), name)
             
             offers = self.fetch_category_offers(slug, max_pages=max_pages)
             
             if offers:
-                normalized = [self.normalize_to_schema(o, slug) for o in offers]
-                
-                # Remove duplicatas dentro da categoria
-                unique = {o["external_id"]: o for o in normalized}
-                normalized = list(unique.values())
-                
-                print(f"   ✅ {len(normalized)} ofertas normalizadas")
+                # fetch_category_offers já devolve itens normalizados
+                normalized = offers
+
+                logger.info("   ✅ %s ofertas normalizadas", len(normalized))
                 
                 # NOVO: Salva e faz upload ao final de cada categoria
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 filename = f"superbid_{slug}_final_{timestamp}.json"
                 self.save_json(normalized, filename)
                 
-                print(f"   📤 Enviando categoria para Supabase...")
-                upload_to_supabase(normalized)
+                logger.info("   📤 Categoria na fila de upload...")
+                self.queue_upload(normalized)
                 
                 all_offers.extend(normalized)
             else:
-                print(f"   ⚠️ Nenhuma oferta encontrada")
+                logger.warning("   ⚠️ Nenhuma oferta encontrada")
             
             if category_count < len(CATEGORIES) and not self.check_timeout():
                 self.random_delay(CATEGORY_DELAY_MIN, CATEGORY_DELAY_MAX, 
                                 f"Próxima categoria ({category_count + 1}/{len(CATEGORIES)})")
         
-        # Remove duplicatas globais
-        unique = {o["external_id"]: o for o in all_offers}
-        all_offers = list(unique.values())
-        
+        # Duplicatas globais já foram descartadas na coleta (self._seen_ids)
+
         # Mostra estatísticas globais de filtros
         total_filtered = sum(self.filtered_stats.values())
         if total_filtered > 0:
-            print(f"\n🚫 TOTAL FILTRADO: {total_filtered} ofertas de teste/demo")
-            print(f"   • Sem loja (store_name NULL): {self.filtered_stats['no_store']}")
-            print(f"   • Vendedor Demo: {self.filtered_stats['demo_seller']}")
-            print(f"   • Leiloeiro Demo: {self.filtered_stats['demo_auctioneer']}")
-            print(f"   • Texto 'deploy': {self.filtered_stats['deploy_text']}")
+            logger.info("\n🚫 TOTAL FILTRADO: %s ofertas de teste/demo", total_filtered)
+            logger.info("   • Sem loja (store_name NULL): %s", self.filtered_stats['no_store'])
+            logger.info("   • Vendedor Demo: %s", self.filtered_stats['demo_seller'])
+            logger.info("   • Leiloeiro Demo: %s", self.filtered_stats['demo_auctioneer'])
+            logger.info("   • Texto 'deploy': %s", self.filtered_stats['deploy_text'])
         
-        print(f"\n✅ Total único global: {len(all_offers)} ofertas válidas")
+        logger.info("\n✅ Total único global: %s ofertas válidas", len(all_offers))
         return all_offers
     
     def save_json(self, data, filename: str):
+        """Enfileira a gravação para o worker de I/O (não bloqueia o scraping)"""
+        self._sink_q.put(('save', data, filename))
+        return OUTPUT_DIR / filename
+
+    def _write_json(self, data, filename: str):
         filepath = OUTPUT_DIR / filename
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
-        print(f"   💾 Salvo: {filepath}")
+        if orjson is not None:
+            option = orjson.OPT_INDENT_2 if self.pretty_json else 0
+            with open(filepath, "wb") as f:
+                f.write(orjson.dumps(data, option=option, default=str))
+        else:
+            indent = 2 if self.pretty_json else None
+            with open(filepath, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=indent, default=str)
+        logger.info("   💾 Salvo: %s", filepath)
         return filepath
 
 
@@ -459,7 +838,7 @@ def upload_to_supabase(offers: List[Dict]):
         
         client = SupabaseClient()
         
-        print(f"   📤 Enviando {len(offers)} itens para Supabase...")
+        logger.info("   📤 Enviando %s itens para Supabase...", len(offers))
         
         # Salva dados RAW
         client.insert_raw('superbid', offers)
@@ -468,18 +847,18 @@ def upload_to_supabase(offers: List[Dict]):
         inserted = client.insert_normalized(offers)
         
         if inserted > 0:
-            print(f"   ✅ {inserted} itens processados com sucesso")
+            logger.info("   ✅ %s itens processados com sucesso", inserted)
             return True
         else:
-            print("   ℹ️ Nenhum item novo (todos já existem)")
+            logger.info("   ℹ️ Nenhum item novo (todos já existem)")
             return True
         
     except ImportError:
-        print("\n   ❌ supabase_client.py não encontrado")
-        print("   ⚠️ Os dados foram salvos localmente mas não enviados ao Supabase")
+        logger.error("\n   ❌ supabase_client.py não encontrado")
+        logger.warning("   ⚠️ Os dados foram salvos localmente mas não enviados ao Supabase")
         return False
     except Exception as e:
-        print(f"\n   ❌ Erro ao enviar para Supabase: {e}")
+        logger.error("\n   ❌ Erro ao enviar para Supabase: %s", e)
         import traceback
         traceback.print_exc()
         return False
@@ -487,81 +866,90 @@ def upload_to_supabase(offers: List[Dict]):
 
 def main():
     import argparse
-    
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
     parser = argparse.ArgumentParser(description='Superbid Scraper')
     parser.add_argument('--categoria', type=str, help='Slug da categoria')
     parser.add_argument('--full-update', action='store_true', help='Todas as categorias')
     parser.add_argument('--max-pages', type=int, help='Limite de páginas')
-    
+    parser.add_argument('--pretty', action='store_true', help='JSON identado nos arquivos salvos')
+
     args = parser.parse_args()
     
-    print("="*60)
-    print("🚀 SUPERBID SCRAPER")
-    print("="*60)
-    print(f"⏰ Início: {datetime.now().strftime('%H:%M:%S')}")
-    print(f"⏱️ Timeout: 2h58min\n")
+    logger.info("=" * 60)
+    logger.info("🚀 SUPERBID SCRAPER")
+    logger.info("=" * 60)
+    logger.info("⏰ Início: %s", datetime.now().strftime('%H:%M:%S'))
+    logger.info("⏱️ Timeout: 2h58min\n")
     
     scraper = SuperbidScraper()
-    
+    scraper.pretty_json = args.pretty
+
     try:
         if args.full_update:
-            print(f"📦 Processando {len(CATEGORIES)} categorias...\n")
+            logger.info("📦 Processando %s categorias...\n", len(CATEGORIES))
             offers = scraper.scrape_all(max_pages=args.max_pages)
             
             if offers:
                 # Salva consolidado final
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 scraper.save_json(offers, f"superbid_full_consolidated_{timestamp}.json")
-                print("\n✅ Arquivo consolidado salvo")
+                logger.info("\n✅ Arquivo consolidado salvo")
             else:
-                print("\n⚠️ Nenhuma oferta coletada")
+                logger.warning("\n⚠️ Nenhuma oferta coletada")
         
         elif args.categoria:
             if args.categoria not in CATEGORIES:
-                print(f"❌ Categoria '{args.categoria}' não existe!")
-                print(f"\n📋 Categorias disponíveis:")
+                logger.error("❌ Categoria '%s' não existe!", args.categoria)
+                logger.info("\n📋 Categorias disponíveis:")
                 for key in sorted(CATEGORIES.keys()):
-                    print(f"   • {key}")
+                    logger.info("   • %s", key)
                 sys.exit(1)
             
             offers = scraper.fetch_category_offers(args.categoria, max_pages=args.max_pages)
             
             if offers:
-                normalized = [scraper.normalize_to_schema(o, args.categoria) for o in offers]
-                unique = {o["external_id"]: o for o in normalized}
-                normalized = list(unique.values())
-                
-                print(f"\n✅ Total único: {len(normalized)} ofertas")
+                # fetch_category_offers já devolve itens normalizados
+                normalized = offers
+
+                logger.info("\n✅ Total único: %s ofertas", len(normalized))
                 
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 scraper.save_json(normalized, f"superbid_{args.categoria}_final_{timestamp}.json")
                 upload_to_supabase(normalized)
             else:
-                print("\n⚠️ Nenhuma oferta encontrada")
+                logger.warning("\n⚠️ Nenhuma oferta encontrada")
         
         else:
-            print("❌ Use --categoria <slug> ou --full-update")
-            print(f"\n📋 Categorias disponíveis:")
+            logger.error("❌ Use --categoria <slug> ou --full-update")
+            logger.info("\n📋 Categorias disponíveis:")
             for key in sorted(CATEGORIES.keys()):
-                print(f"   • {key}")
+                logger.info("   • %s", key)
             sys.exit(1)
     
     except KeyboardInterrupt:
-        print("\n\n⚠️ Interrompido pelo usuário")
+        logger.warning("\n\n⚠️ Interrompido pelo usuário")
         sys.exit(0)
     except Exception as e:
-        print(f"\n❌ Erro fatal: {e}")
+        logger.error("\n❌ Erro fatal: %s", e)
         import traceback
         traceback.print_exc()
         sys.exit(1)
     finally:
+        # Drena a fila de I/O (gravações + uploads) antes de encerrar
+        logger.info("\n⏳ Aguardando gravações e uploads em background...")
+        scraper.flush_uploads()
+        scraper._sink_q.put(None)
+        scraper._sink_thread.join()
+
         elapsed = time.time() - scraper.start_time
         elapsed_min = int(elapsed // 60)
         elapsed_sec = int(elapsed % 60)
         
-        print(f"\n⏰ Fim: {datetime.now().strftime('%H:%M:%S')}")
-        print(f"⏱️ Tempo total: {elapsed_min}min {elapsed_sec}s")
-        print("="*60)
+        logger.info("\n⏰ Fim: %s", datetime.now().strftime('%H:%M:%S'))
+        logger.info("⏱️ Tempo total: %smin %ss", elapsed_min, elapsed_sec)
+        logger.info("=" * 60)
     
     sys.exit(0)
 